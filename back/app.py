@@ -3,45 +3,148 @@
 # Minimal Flask backend for Mock Test System
 # Depends on:
 #   pip install flask flask-cors mysql-connector-python
+#   pip install cryptography    # exam bundles (bundles.py)
+#   pip install orjson          # optional, faster JSON responses
 #
-# NOTE: This assumes you already created the MySQL tables similar to:
-#   classes, teachers, students, tests, questions, results, answers
-# (as we discussed before)
+# NOTE: The schema and its indexes are managed by migrate.py:
+#   python migrate.py            # create tables / apply pending migrations
+#   python check_query_plans.py  # EXPLAIN every route query on seeded data
+# Results/answers of closed terms can be moved to archive_data/ with archive.py.
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 import mysql.connector
 from datetime import datetime
+import hashlib
+import json
+
+import profiling
+from archive import archived_results_for_student, archived_results_for_test
+import bundles
+from bundles import bundle_key, bundle_path, load_manifest, public_manifest, publish_test
+from serializers import (
+    CLASS, QUESTION, STUDENT, STUDENT_RESULT, TEACHER, TEST, TEST_RESULT, dumps
+)
+from shared_cache import NAMESPACES, SharedCache
 
 app = Flask(__name__)
 # Allow React dev server
 CORS(app, resources={r"/*": {"origins": "*"}})
+# Opt-in query profiler (MOCKTEST_PROFILE=1), see profiling.py
+profiling.init_app(app)
 
 
 # ---------------------- DB CONNECTION ---------------------- #
 
+# Adjust host/user/password/database according to your setup.
+DB_CONFIG = dict(
+    host="localhost",
+    user="root",
+    password="User@123",   # 🔁 change this
+    database="mock_data_db",         # 🔁 change this
+    autocommit=True
+)
+
+
 def get_db():
     """
-    Returns a new DB connection.
-    Adjust host/user/password/database according to your setup.
+    Returns a new DB connection (wrapped for profiling when enabled).
     """
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="User@123",   # 🔁 change this
-        database="mock_data_db",         # 🔁 change this
-        autocommit=True
+    return profiling.wrap_connection(
+        mysql.connector.connect(**DB_CONFIG),
+        lambda: mysql.connector.connect(**DB_CONFIG)
     )
 
 
+# Host-wide cache of encoded responses, shared by all worker processes
+# (see shared_cache.py). Writes call get_cache().invalidate(<namespace>).
+_cache = None
+
+
+def get_cache():
+    """
+    Opened on first use, so tools that import app (migrate.py, archive.py,
+    ...) do not create the cache file.
+    """
+    global _cache
+    if _cache is None:
+        _cache = SharedCache.for_host(DB_CONFIG["database"])
+    return _cache
+
+
+def clear_cache():
+    """
+    Drops every cached response. The cache file outlives restarts, so this
+    runs once at server start (not per worker) and after tools that change
+    cached data outside the app.
+    """
+    for namespace in NAMESPACES:
+        get_cache().invalidate(namespace)
+
+
 # ---------------------- UTILS ---------------------- #
 
-def rows_to_dicts(cursor):
+def json_response(body, status=200):
+    """
+    Wrap already-encoded JSON bytes (see serializers.py) in a Response.
+    """
+    return Response(body, status=status, mimetype="application/json")
+
+
+def merge_archived(rows, archived, submitted_idx):
     """
-    Convert cursor result to list[dict]
+    Hot rows plus archived ones, newest submission first (unsubmitted
+    last), as the ORDER BY submitted_at DESC of the hot query. Rows an
+    interrupted archive run left in both places are kept once.
     """
-    columns = [c[0] for c in cursor.description]
-    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    hot_ids = {row[0] for row in rows}
+    merged = rows + [row for row in archived if row[0] not in hot_ids]
+    merged.sort(key=lambda row: (row[submitted_idx] is not None, row[submitted_idx] or 0), reverse=True)
+    return merged
+
+
+def question_hash(text, choices, correct_index):
+    """
+    Content hash used as the question bank key.
+    Same text + choices + correct answer -> same bank entry.
+    """
+    payload = json.dumps(
+        [(text or "").strip(), [(c or "").strip() for c in choices], int(correct_index)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def bank_question_id(cur, q):
+    """
+    Returns the question_bank id for a question payload
+    ({question, choices, correctAnswer, score}), inserting it only
+    if this exact content is not already in the bank.
+    """
+    text = q.get("question", "")
+    choices = (list(q.get("choices") or []) + ["", "", "", ""])[:4]
+    correct_idx = q.get("correctAnswer", 0)
+
+    # LAST_INSERT_ID(id) makes lastrowid point at the existing row on duplicates
+    cur.execute(
+        """
+        INSERT INTO question_bank
+        (content_hash, question_text, choice_0, choice_1, choice_2, choice_3, correct_index, score)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+        """,
+        (
+            question_hash(text, choices, correct_idx),
+            text,
+            choices[0],
+            choices[1],
+            choices[2],
+            choices[3],
+            correct_idx,
+            q.get("score", 0),
+        )
+    )
+    return cur.lastrowid
 
 
 # ---------------------- AUTH: /api/login ---------------------- #
@@ -137,13 +240,19 @@ def list_classes():
       {id, department, year, section}, ...
     ]
     """
+    body = get_cache().get("classes", "all")
+    if body is not None:
+        return json_response(body)
+    generation = get_cache().generation("classes")
+
     db = get_db()
     cur = db.cursor()
 
     try:
         cur.execute("SELECT id, department, year, section FROM classes")
-        classes = rows_to_dicts(cur)
-        return jsonify(classes)
+        body = CLASS.encode(cur.fetchall())
+        get_cache().set("classes", "all", body, generation)
+        return json_response(body)
     finally:
         cur.close()
         db.close()
@@ -170,9 +279,15 @@ def create_test():
           "correctAnswer": 1,
           "score": 5
         },
+        { "bankId": 42, "score": 2 },   # reuse a bank question, score optional
         ...
-      ]
+      ],
+      "reuseTestId": 7                  # optional: reuse all questions of test 7
     }
+
+    Question content is stored once in question_bank (keyed by content
+    hash); the questions table only links tests to bank entries, with
+    an optional per-test score override.
     """
     data = request.get_json() or {}
 
@@ -182,14 +297,31 @@ def create_test():
     class_id = data.get("classId")
     teacher_id = data.get("teacherId")
     questions = data.get("questions", [])
+    reuse_test_id = data.get("reuseTestId")
 
-    if not all([subject, scheduled_date, duration, class_id, teacher_id]) or not questions:
+    if not all([subject, scheduled_date, duration, class_id, teacher_id]) or not (questions or reuse_test_id):
         return jsonify({"error": "Missing fields"}), 400
 
+    try:
+        bank_ids = {int(q["bankId"]) for q in questions if q.get("bankId")}
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid bankId"}), 400
+
     db = get_db()
     cur = db.cursor()
 
     try:
+        if bank_ids:
+            marks = ", ".join(["%s"] * len(bank_ids))
+            cur.execute(f"SELECT id FROM question_bank WHERE id IN ({marks})", list(bank_ids))
+            unknown = bank_ids - {row[0] for row in cur.fetchall()}
+            if unknown:
+                return jsonify({"error": "Unknown bankId",
+                                "bankIds": sorted(unknown)}), 400
+
+        # test + questions go in together, so a rejected request leaves no test behind
+        db.start_transaction()
+
         # Insert into tests
         cur.execute(
             """
@@ -201,27 +333,39 @@ def create_test():
         )
         test_id = cur.lastrowid
 
-        # Insert questions
-        for q in questions:
+        # Bulk reuse of another test's questions (one INSERT ... SELECT)
+        if reuse_test_id:
             cur.execute(
                 """
-                INSERT INTO questions
-                (test_id, question_text, choice_0, choice_1, choice_2, choice_3, correct_index, score)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                INSERT INTO questions (test_id, bank_id, score)
+                SELECT %s, bank_id, score FROM questions WHERE test_id = %s ORDER BY id
                 """,
-                (
-                    test_id,
-                    q.get("question", ""),
-                    q.get("choices", ["", "", "", ""])[0],
-                    q.get("choices", ["", "", "", ""])[1],
-                    q.get("choices", ["", "", "", ""])[2],
-                    q.get("choices", ["", "", "", ""])[3],
-                    q.get("correctAnswer", 0),
-                    q.get("score", 0),
-                )
+                (test_id, reuse_test_id)
+            )
+            if cur.rowcount == 0:
+                db.rollback()
+                return jsonify({"error": "Test to reuse has no questions"}), 400
+
+        # Link questions (new content goes into the bank first)
+        rows = []
+        for q in questions:
+            bank_id = int(q["bankId"]) if q.get("bankId") else bank_question_id(cur, q)
+            rows.append((test_id, bank_id, q.get("score")))
+
+        if rows:
+            cur.executemany(
+                "INSERT INTO questions (test_id, bank_id, score) VALUES (%s, %s, %s)",
+                rows
             )
+        db.commit()
 
+        get_cache().invalidate("tests")
+        get_cache().invalidate("answer_keys")
         return jsonify({"message": "Test created", "testId": test_id})
+    except Exception:
+        if db.in_transaction:
+            db.rollback()
+        raise
     finally:
         cur.close()
         db.close()
@@ -235,6 +379,12 @@ def get_tests_for_teacher(teacher_id):
     Returns tests created by this teacher.
     Used in TeacherViewResults dropdown.
     """
+    key = f"teacher:{teacher_id}"
+    body = get_cache().get("tests", key)
+    if body is not None:
+        return json_response(body)
+    generation = get_cache().generation("tests")
+
     db = get_db()
     cur = db.cursor()
 
@@ -248,18 +398,9 @@ def get_tests_for_teacher(teacher_id):
             """,
             (teacher_id,)
         )
-        rows = cur.fetchall()
-        tests = []
-        for row in rows:
-            t_id, subject, sched_dt, duration, status = row
-            tests.append({
-                "id": t_id,
-                "subject": subject,
-                "scheduledDate": sched_dt.isoformat() if isinstance(sched_dt, datetime) else None,
-                "duration": duration,
-                "status": status,
-            })
-        return jsonify(tests)
+        body = TEST.encode(cur.fetchall())
+        get_cache().set("tests", key, body, generation)
+        return json_response(body)
     finally:
         cur.close()
         db.close()
@@ -285,6 +426,12 @@ def get_tests_for_student(student_id):
 
         class_id = row[0]
 
+        key = f"class:{class_id}"
+        body = get_cache().get("tests", key)
+        if body is not None:
+            return json_response(body)
+        generation = get_cache().generation("tests")
+
         cur.execute(
             """
             SELECT id, subject, scheduled_datetime, duration_minutes, status
@@ -294,18 +441,9 @@ def get_tests_for_student(student_id):
             """,
             (class_id,)
         )
-        rows = cur.fetchall()
-        tests = []
-        for row in rows:
-            t_id, subject, sched_dt, duration, status = row
-            tests.append({
-                "id": t_id,
-                "subject": subject,
-                "scheduledDate": sched_dt.isoformat() if isinstance(sched_dt, datetime) else None,
-                "duration": duration,
-                "status": status,
-            })
-        return jsonify(tests)
+        body = TEST.encode(cur.fetchall())
+        get_cache().set("tests", key, body, generation)
+        return json_response(body)
     finally:
         cur.close()
         db.close()
@@ -319,6 +457,12 @@ def get_test_detail(test_id):
     Returns test info + questions.
     Used when student clicks 'Start Test'.
     """
+    key = f"detail:{test_id}"
+    body = get_cache().get("tests", key)
+    if body is not None:
+        return json_response(body)
+    generation = get_cache().generation("tests")
+
     db = get_db()
     cur = db.cursor()
 
@@ -335,44 +479,118 @@ def get_test_detail(test_id):
         if not row:
             return jsonify({"error": "Test not found"}), 404
 
-        t_id, subject, sched_dt, duration, status = row
-        test = {
-            "id": t_id,
-            "subject": subject,
-            "scheduledDate": sched_dt.isoformat() if isinstance(sched_dt, datetime) else None,
-            "duration": duration,
-            "status": status,
-        }
+        test = TEST.one(row)
 
         # Questions
         cur.execute(
             """
-            SELECT id, question_text, choice_0, choice_1, choice_2, choice_3,
-                   correct_index, score
-            FROM questions
-            WHERE test_id = %s
+            SELECT q.id, b.question_text, b.choice_0, b.choice_1, b.choice_2, b.choice_3,
+                   b.correct_index, COALESCE(q.score, b.score), b.id
+            FROM questions q
+            JOIN question_bank b ON q.bank_id = b.id
+            WHERE q.test_id = %s
+            ORDER BY q.id
             """,
             (test_id,)
         )
 
-        questions = []
-        for row in cur.fetchall():
-            q_id, text, c0, c1, c2, c3, correct_idx, score = row
-            questions.append({
-                "id": q_id,
-                "question": text,
-                "choices": [c0, c1, c2, c3],
-                "correctAnswer": correct_idx,
-                "score": score
-            })
-
-        test["questions"] = questions
-        return jsonify(test)
+        test["questions"] = list(map(QUESTION.one, cur.fetchall()))
+        body = dumps(test)
+        get_cache().set("tests", key, body, generation)
+        return json_response(body)
     finally:
         cur.close()
         db.close()
 
 
+# ---------------------- TESTS: PUBLISHED BUNDLES -------------------- #
+
+# bundle files and released keys never change for a given version
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+@app.route("/api/tests/<int:test_id>/publish", methods=["POST"])
+def publish_test_bundle(test_id):
+    """
+    Teacher publishes (or re-publishes after edits) a test as an encrypted,
+    student-safe bundle. Returns the public manifest.
+    """
+    if bundles.AESGCM is None:
+        return jsonify({"error": "Publishing is not available: pip install cryptography"}), 503
+
+    db = get_db()
+
+    try:
+        manifest = publish_test(db, test_id)
+        if manifest is None:
+            return jsonify({"error": "Test not found"}), 404
+        return jsonify(public_manifest(manifest))
+    finally:
+        db.close()
+
+
+@app.route("/api/tests/<int:test_id>/bundle", methods=["GET"])
+def get_test_bundle(test_id):
+    """
+    Bundle manifest for prefetching, available PREFETCH_WINDOW before
+    the test starts. Served from disk, no DB access:
+    {testId, version, file, sha256, size, prefetchFrom, unlockAt, url, keyUrl}
+    """
+    manifest = load_manifest(test_id)
+    if manifest is None:
+        return jsonify({"error": "Test not published"}), 404
+    if datetime.now() < datetime.fromisoformat(manifest["prefetchFrom"]):
+        return jsonify({"error": "Bundle not available yet",
+                        "prefetchFrom": manifest["prefetchFrom"]}), 403
+
+    out = public_manifest(manifest)
+    out["url"] = f"/api/bundles/{manifest['file']}"
+    out["keyUrl"] = f"/api/tests/{test_id}/bundle/v{manifest['version']}/key"
+    resp = jsonify(out)
+    # short: a re-publish must reach clients before the exam starts
+    resp.headers["Cache-Control"] = "public, max-age=60"
+    return resp
+
+
+@app.route("/api/bundles/<filename>", methods=["GET"])
+def get_bundle_file(filename):
+    """
+    Encrypted bundle bytes (see bundles.py), cacheable forever.
+    """
+    path, manifest = bundle_path(filename)
+    if path is None:
+        return jsonify({"error": "Bundle not found"}), 404
+    if datetime.now() < datetime.fromisoformat(manifest["prefetchFrom"]):
+        return jsonify({"error": "Bundle not available yet",
+                        "prefetchFrom": manifest["prefetchFrom"]}), 403
+
+    resp = send_file(path, mimetype="application/octet-stream", conditional=True)
+    resp.headers["Cache-Control"] = IMMUTABLE_CACHE
+    return resp
+
+
+@app.route("/api/tests/<int:test_id>/bundle/v<int:version>/key", methods=["GET"])
+def get_bundle_key(test_id, version):
+    """
+    Decryption key of a bundle version, released at the scheduled start.
+    Keys of older versions stay available for clients that prefetched
+    them before a re-publish:
+    { "version": 1, "key": "<base64 AES-256 key>" }
+    """
+    manifest = load_manifest(test_id)
+    key = bundle_key(manifest, version) if manifest else None
+    if key is None:
+        return jsonify({"error": "Bundle version not found"}), 404
+    if datetime.now() < datetime.fromisoformat(manifest["unlockAt"]):
+        resp = jsonify({"error": "Test has not started", "unlockAt": manifest["unlockAt"]})
+        resp.headers["Cache-Control"] = "no-store"
+        return resp, 403
+
+    resp = jsonify({"version": version, "key": key})
+    resp.headers["Cache-Control"] = IMMUTABLE_CACHE
+    return resp
+
+
 # ---------------------- TESTS: SUBMIT (STUDENT) --------------------- #
 
 @app.route("/api/tests/<int:test_id>/submit", methods=["POST"])
@@ -400,12 +618,23 @@ def submit_test(test_id):
     cur = db.cursor()
 
     try:
-        # Fetch questions to compute score
-        cur.execute(
-            "SELECT id, correct_index, score FROM questions WHERE test_id = %s",
-            (test_id,)
-        )
-        q_rows = cur.fetchall()
+        # Answer key: [[question id, correct index, score], ...]
+        cached = get_cache().get("answer_keys", test_id)
+        if cached is not None:
+            q_rows = json.loads(cached)
+        else:
+            generation = get_cache().generation("answer_keys")
+            cur.execute(
+                """
+                SELECT q.id, b.correct_index, COALESCE(q.score, b.score)
+                FROM questions q
+                JOIN question_bank b ON q.bank_id = b.id
+                WHERE q.test_id = %s
+                """,
+                (test_id,)
+            )
+            q_rows = cur.fetchall()
+            get_cache().set("answer_keys", test_id, dumps(q_rows), generation)
 
         total_score = 0
         earned_score = 0
@@ -460,6 +689,7 @@ def submit_test(test_id):
 def get_results_for_test(test_id):
     """
     Teacher sees all student results for a given test.
+    Results of archived (closed) terms are read from archive_data/.
     """
     db = get_db()
     cur = db.cursor()
@@ -476,25 +706,8 @@ def get_results_for_test(test_id):
             """,
             (test_id,)
         )
-        rows = cur.fetchall()
-        results = []
-        for row in rows:
-            r_id, reg, name, score, total, submitted_at, feedback, sent = row
-            if isinstance(submitted_at, datetime):
-                submitted_str = submitted_at.isoformat()
-            else:
-                submitted_str = None
-            results.append({
-                "id": r_id,
-                "studentRegNum": reg,
-                "studentName": name,
-                "score": score,
-                "totalScore": total,
-                "submittedAt": submitted_str,
-                "feedback": feedback,
-                "sent": bool(sent),
-            })
-        return jsonify(results)
+        rows = merge_archived(cur.fetchall(), archived_results_for_test(test_id), 5)
+        return json_response(TEST_RESULT.encode(rows))
     finally:
         cur.close()
         db.close()
@@ -529,12 +742,138 @@ def send_feedback(result_id):
         db.close()
 
 
+# rows per UPDATE statement in bulk feedback
+BULK_FEEDBACK_CHUNK = 500
+
+
+def feedback_for_band(bands, score, total):
+    """
+    bands: [{"min": 80, "feedback": "..."}, ...] on the percentage score;
+    the highest band whose min is reached wins.
+    """
+    pct = (score * 100.0 / total) if total else 0.0
+    for band in sorted(bands, key=lambda b: b.get("min", 0), reverse=True):
+        if pct >= band.get("min", 0):
+            return band.get("feedback", "")
+    return None
+
+
+@app.route("/api/results/feedback/bulk", methods=["POST"])
+def send_feedback_bulk():
+    """
+    Teacher saves feedback for many results at once.
+
+    Expects JSON, either explicit pairs:
+    { "items": [ {"resultId": 1, "feedback": "Good job"}, ... ] }
+
+    or a template applied by score band to every result of a test:
+    {
+      "testId": 5,
+      "bands": [ {"min": 80, "feedback": "Excellent"},
+                 {"min": 0,  "feedback": "Keep practising"} ]
+    }
+
+    All rows are updated in one transaction with one UPDATE per
+    BULK_FEEDBACK_CHUNK rows. Returns the outcome of every row:
+    { "updated": 2, "results": [ {"resultId": 1, "status": "updated"}, ... ] }
+    status is one of updated / not_found / invalid / duplicate / no_band;
+    for a resultId listed more than once only its first item is applied,
+    the later ones are reported as duplicate.
+    """
+    data = request.get_json() or {}
+    items = data.get("items")
+    test_id = data.get("testId")
+    bands = data.get("bands")
+
+    if not items and not (test_id and bands):
+        return jsonify({"error": "Missing items or testId/bands"}), 400
+    if items and not isinstance(items, list):
+        return jsonify({"error": "items must be a list"}), 400
+    if not items and not (isinstance(bands, list) and all(
+            isinstance(b, dict) and isinstance(b.get("min", 0), (int, float))
+            and isinstance(b.get("feedback", ""), str) for b in bands)):
+        return jsonify({"error": "bands must be a list of {min, feedback} objects"}), 400
+
+    db = get_db()
+    cur = db.cursor()
+
+    try:
+        db.start_transaction()
+        outcomes = []
+        feedback_by_id = {}
+
+        if items:
+            for item in items:
+                if not isinstance(item, dict):
+                    outcomes.append({"resultId": item, "status": "invalid"})
+                    continue
+                try:
+                    r_id = int(item.get("resultId"))
+                except (TypeError, ValueError):
+                    outcomes.append({"resultId": item.get("resultId"), "status": "invalid"})
+                    continue
+                feedback = item.get("feedback", "")
+                if not isinstance(feedback, (str, type(None))):
+                    outcomes.append({"resultId": r_id, "status": "invalid"})
+                    continue
+                if r_id in feedback_by_id:
+                    outcomes.append({"resultId": r_id, "status": "duplicate"})
+                    continue
+                feedback_by_id[r_id] = feedback
+
+            existing = set()
+            ids = list(feedback_by_id)
+            for i in range(0, len(ids), BULK_FEEDBACK_CHUNK):
+                chunk = ids[i:i + BULK_FEEDBACK_CHUNK]
+                marks = ", ".join(["%s"] * len(chunk))
+                cur.execute(f"SELECT id FROM results WHERE id IN ({marks}) FOR UPDATE", chunk)
+                existing.update(row[0] for row in cur.fetchall())
+
+            for r_id in ids:
+                if r_id not in existing:
+                    outcomes.append({"resultId": r_id, "status": "not_found"})
+                    del feedback_by_id[r_id]
+        else:
+            cur.execute(
+                "SELECT id, score, total_score FROM results WHERE test_id = %s FOR UPDATE",
+                (test_id,)
+            )
+            for r_id, score, total in cur.fetchall():
+                feedback = feedback_for_band(bands, score, total)
+                if feedback is None:
+                    outcomes.append({"resultId": r_id, "status": "no_band"})
+                else:
+                    feedback_by_id[r_id] = feedback
+
+        pairs = list(feedback_by_id.items())
+        for i in range(0, len(pairs), BULK_FEEDBACK_CHUNK):
+            chunk = pairs[i:i + BULK_FEEDBACK_CHUNK]
+            cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+            marks = ", ".join(["%s"] * len(chunk))
+            params = [v for pair in chunk for v in pair] + [r_id for r_id, _ in chunk]
+            cur.execute(
+                f"UPDATE results SET feedback = CASE id {cases} END, sent = 1 WHERE id IN ({marks})",
+                params
+            )
+        db.commit()
+
+        outcomes.extend({"resultId": r_id, "status": "updated"} for r_id, _ in pairs)
+        return jsonify({"updated": len(pairs), "results": outcomes})
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+        db.close()
+
+
 # ---------------------- RESULTS: FOR STUDENT ------------------------ #
 
 @app.route("/api/results/student/<int:student_id>", methods=["GET"])
 def get_results_for_student(student_id):
     """
     Student sees all their own results.
+    Results of archived (closed) terms are read from archive_data/.
     """
     db = get_db()
     cur = db.cursor()
@@ -551,20 +890,8 @@ def get_results_for_student(student_id):
             """,
             (student_id,)
         )
-        rows = cur.fetchall()
-        out = []
-        for row in rows:
-            r_id, subject, score, total, submitted_at, feedback = row
-            submitted_str = submitted_at.isoformat() if isinstance(submitted_at, datetime) else None
-            out.append({
-                "id": r_id,
-                "subject": subject,
-                "score": score,
-                "totalScore": total,
-                "submittedAt": submitted_str,
-                "feedback": feedback,
-            })
-        return jsonify(out)
+        rows = merge_archived(cur.fetchall(), archived_results_for_student(student_id), 4)
+        return json_response(STUDENT_RESULT.encode(rows))
     finally:
         cur.close()
         db.close()
@@ -613,21 +940,18 @@ def admin_login():
 
 @app.route("/api/admin/classes", methods=["GET"])
 def admin_list_classes():
+    body = get_cache().get("classes", "sorted")
+    if body is not None:
+        return json_response(body)
+    generation = get_cache().generation("classes")
+
     db = get_db()
     cur = db.cursor()
     try:
         cur.execute("SELECT id, department, year, section FROM classes ORDER BY department, year, section")
-        rows = cur.fetchall()
-        classes = []
-        for row in rows:
-            c_id, dept, year, section = row
-            classes.append({
-                "id": c_id,
-                "department": dept,
-                "year": year,
-                "section": section
-            })
-        return jsonify(classes)
+        body = CLASS.encode(cur.fetchall())
+        get_cache().set("classes", "sorted", body, generation)
+        return json_response(body)
     finally:
         cur.close()
         db.close()
@@ -652,6 +976,7 @@ def admin_create_class():
             (department, year, section)
         )
         class_id = cur.lastrowid
+        get_cache().invalidate("classes")
         return jsonify({"id": class_id, "department": department, "year": year, "section": section})
     finally:
         cur.close()
@@ -664,20 +989,18 @@ def admin_create_class():
 
 @app.route("/api/admin/teachers", methods=["GET"])
 def admin_list_teachers():
+    body = get_cache().get("teachers", "all")
+    if body is not None:
+        return json_response(body)
+    generation = get_cache().generation("teachers")
+
     db = get_db()
     cur = db.cursor()
     try:
         cur.execute("SELECT id, name, email FROM teachers ORDER BY name")
-        rows = cur.fetchall()
-        teachers = []
-        for row in rows:
-            t_id, name, email = row
-            teachers.append({
-                "id": t_id,
-                "name": name,
-                "email": email
-            })
-        return jsonify(teachers)
+        body = TEACHER.encode(cur.fetchall())
+        get_cache().set("teachers", "all", body, generation)
+        return json_response(body)
     finally:
         cur.close()
         db.close()
@@ -702,6 +1025,7 @@ def admin_create_teacher():
             (name, email, password)
         )
         teacher_id = cur.lastrowid
+        get_cache().invalidate("teachers")
         return jsonify({"id": teacher_id, "name": name, "email": email})
     finally:
         cur.close()
@@ -742,21 +1066,7 @@ def admin_list_students():
                 ORDER BY s.reg_num
                 """
             )
-        rows = cur.fetchall()
-        students = []
-        for row in rows:
-            s_id, name, reg, dept, year, section = row
-            students.append({
-                "id": s_id,
-                "name": name,
-                "regNum": reg,
-                "class": {
-                    "department": dept,
-                    "year": year,
-                    "section": section
-                }
-            })
-        return jsonify(students)
+        return json_response(STUDENT.encode(cur.fetchall()))
     finally:
         cur.close()
         db.close()
@@ -832,8 +1142,25 @@ def admin_bulk_students():
         db.close()
 
 
+# ---------------------- DEBUG ------------------------ #
+
+@app.route("/api/debug/profile", methods=["GET"])
+def debug_profile():
+    """
+    Recent request profiles (newest first), only when MOCKTEST_PROFILE=1:
+    [
+      {method, path, status, totalMs, dbMs, encodeMs, pythonMs,
+       queries: [{sql, params, ms, rows, slow?, plan?}, ...]}, ...
+    ]
+    """
+    if not profiling.PROFILE_ENABLED:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    return json_response(dumps(list(reversed(profiling.recent_profiles))))
+
+
 # ---------------------- MAIN ------------------------ #
 
 if __name__ == "__main__":
+    clear_cache()
     # debug=True for development; turn off in production
     app.run(host="0.0.0.0", port=5001, debug=True)
@@ -0,0 +1,413 @@
+# archive.py
+#
+# Cold storage for results/answers of closed terms.
+#
+# Rows are moved out of MySQL into compressed columnar files, one
+# partition per (term, class):
+#
+#   archive_data/term=2024-1/class=3/results.mtc
+#   archive_data/term=2024-1/class=3/answers.mtc
+#   archive_data/index_students.mtc, index_tests.mtc   (id -> partitions)
+#
+# A term is half a calendar year ("2024-1" = Jan-Jun, "2024-2" = Jul-Dec)
+# and a result belongs to the term of its test's scheduled_datetime.
+# Results are stored denormalized (student reg_num/name, test subject) so
+# the results endpoints can read them back without any join.
+#
+# File format (.mtc):
+#   MAGIC | u32 header length | JSON header | zlib-compressed column blocks
+# The header holds the row count and {column: {type, offset, length}}.
+# Files are memory-mapped and only the columns a query needs are inflated.
+#
+# Usage:
+#   python archive.py 2024-1      # archive a closed term
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive_data")
+
+MAGIC = b"MTCOL1\n"
+NULL_INT = -2 ** 63
+EPOCH = datetime(1970, 1, 1)
+
+# column name -> type, in the order they are written
+RESULT_COLUMNS = [
+    ("id", "int"),
+    ("student_id", "int"),
+    ("test_id", "int"),
+    ("score", "int"),
+    ("total_score", "int"),
+    ("submitted_at", "datetime"),
+    ("feedback", "str"),
+    ("sent", "int"),
+    ("reg_num", "str"),
+    ("student_name", "str"),
+    ("subject", "str"),
+]
+
+ANSWER_COLUMNS = [
+    ("result_id", "int"),
+    ("question_id", "int"),
+    ("selected_index", "int"),
+]
+
+
+# ---------------------- TERMS ---------------------- #
+
+def term_bounds(term):
+    """
+    "2024-1" -> (2024-01-01, 2024-07-01), end exclusive.
+    """
+    year, half = (int(p) for p in term.split("-"))
+    if half not in (1, 2):
+        raise ValueError(f"Invalid term: {term}")
+    if half == 1:
+        return datetime(year, 1, 1), datetime(year, 7, 1)
+    return datetime(year, 7, 1), datetime(year + 1, 1, 1)
+
+
+def partition_dir(term, class_id):
+    return os.path.join(ARCHIVE_DIR, f"term={term}", f"class={class_id}")
+
+
+# ---------------------- COLUMNAR FILES ---------------------- #
+
+def _encode_column(col_type, values):
+    if col_type == "int":
+        raw = array("q", (NULL_INT if v is None else int(v) for v in values)).tobytes()
+    elif col_type == "datetime":
+        raw = array("q", (
+            NULL_INT if v is None else (v - EPOCH) // timedelta(microseconds=1)
+            for v in values
+        )).tobytes()
+    else:
+        raw = json.dumps(values, ensure_ascii=False).encode("utf-8")
+    return zlib.compress(raw, 6)
+
+
+def _decode_column(col_type, data):
+    raw = zlib.decompress(data)
+    if col_type == "str":
+        return json.loads(raw.decode("utf-8"))
+    ints = array("q")
+    ints.frombytes(raw)
+    if col_type == "int":
+        return [None if v == NULL_INT else v for v in ints]
+    return [None if v == NULL_INT else EPOCH + timedelta(microseconds=v) for v in ints]
+
+
+def write_columns(path, schema, rows):
+    """
+    Writes rows (list of tuples in schema order) atomically to path.
+    """
+    blocks = []
+    header = {"rows": len(rows), "columns": {}}
+    offset = 0
+    for idx, (name, col_type) in enumerate(schema):
+        block = _encode_column(col_type, [row[idx] for row in rows])
+        header["columns"][name] = {"type": col_type, "offset": offset, "length": len(block)}
+        blocks.append(block)
+        offset += len(block)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+
+
+class ColumnFile:
+    """
+    Read-only, memory-mapped view of a .mtc file.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not an archive file: {path}")
+        start = len(MAGIC)
+        (header_len,) = struct.unpack_from("<I", self._map, start)
+        start += 4
+        header = json.loads(self._map[start:start + header_len])
+        self._data_start = start + header_len
+        self.rows = header["rows"]
+        self.columns = header["columns"]
+
+    def column(self, name):
+        meta = self.columns[name]
+        begin = self._data_start + meta["offset"]
+        return _decode_column(meta["type"], self._map[begin:begin + meta["length"]])
+
+    def read_all(self, schema):
+        cols = [self.column(name) for name, _ in schema]
+        return list(zip(*cols))
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------------- QUERIES (used by app.py) ---------------------- #
+#
+# index_students.mtc / index_tests.mtc map a student or test id to the
+# (term, class) partitions holding its archived results. Ids missing from
+# the index never touch a partition, so students and tests whose results
+# are all still hot pay only a dict lookup. Opened partitions keep their
+# decoded columns and a row index per key column between requests; files
+# are reloaded when their mtime changes (the archive job replaces them).
+
+INDEX_COLUMNS = [("key", "int"), ("term", "str"), ("class_id", "int")]
+PARTITION_CACHE_SIZE = 16
+
+_lock = threading.Lock()
+_indexes = {}                   # kind -> (mtime, {id: [(term, class_id), ...]})
+_partitions = OrderedDict()     # results.mtc path -> _Partition, LRU order
+
+
+def _index_path(kind):
+    return os.path.join(ARCHIVE_DIR, f"index_{kind}.mtc")
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _index(kind):
+    path = _index_path(kind)
+    mtime = _mtime(path)
+    if mtime is None:
+        return {}
+    cached = _indexes.get(kind)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    entries = {}
+    with ColumnFile(path) as f:
+        for key, term, class_id in f.read_all(INDEX_COLUMNS):
+            entries.setdefault(key, []).append((term, class_id))
+    _indexes[kind] = (mtime, entries)
+    return entries
+
+
+class _Partition:
+    """
+    An open results.mtc with lazily decoded columns and row positions
+    grouped by key value.
+    """
+
+    def __init__(self, path, mtime):
+        self.mtime = mtime
+        self.file = ColumnFile(path)
+        self._columns = {}
+        self._positions = {}
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = self.file.column(name)
+        return self._columns[name]
+
+    def rows(self, key, value, columns):
+        if key not in self._positions:
+            positions = {}
+            for i, v in enumerate(self.column(key)):
+                positions.setdefault(v, []).append(i)
+            self._positions[key] = positions
+        hits = self._positions[key].get(value)
+        if not hits:
+            return []
+        cols = [self.column(name) for name in columns]
+        return [tuple(col[i] for col in cols) for i in hits]
+
+    def close(self):
+        self.file.close()
+
+
+def _partition(path):
+    mtime = _mtime(path)
+    part = _partitions.pop(path, None)
+    if part is not None and part.mtime != mtime:
+        part.close()
+        part = None
+    if mtime is None:
+        return None
+    if part is None:
+        part = _Partition(path, mtime)
+    _partitions[path] = part
+    while len(_partitions) > PARTITION_CACHE_SIZE:
+        _partitions.popitem(last=False)[1].close()
+    return part
+
+
+def _select(kind, key, value, columns, sort_column):
+    out = []
+    with _lock:
+        for term, class_id in _index(kind).get(value, ()):
+            part = _partition(os.path.join(partition_dir(term, class_id), "results.mtc"))
+            if part is not None:
+                out.extend(part.rows(key, value, columns))
+
+    sort_idx = columns.index(sort_column)
+    out.sort(key=lambda row: row[sort_idx] or EPOCH, reverse=True)
+    return out
+
+
+def archived_results_for_test(test_id):
+    """
+    Rows shaped like the hot query in get_results_for_test:
+    (id, reg_num, name, score, total_score, submitted_at, feedback, sent)
+    """
+    return _select(
+        "tests", "test_id", test_id,
+        ["id", "reg_num", "student_name", "score", "total_score",
+         "submitted_at", "feedback", "sent"],
+        "submitted_at",
+    )
+
+
+def archived_results_for_student(student_id):
+    """
+    Rows shaped like the hot query in get_results_for_student:
+    (id, subject, score, total_score, submitted_at, feedback)
+    Found through the index, so class changes do not hide old results.
+    """
+    return _select(
+        "students", "student_id", student_id,
+        ["id", "subject", "score", "total_score", "submitted_at", "feedback"],
+        "submitted_at",
+    )
+
+
+# ---------------------- ARCHIVAL JOB ---------------------- #
+
+def _chunks(items, size=1000):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _merge(path, schema, rows, key):
+    """
+    Adds rows to an existing partition file (re-runs / late results),
+    keeping one row per key(row).
+    """
+    if os.path.exists(path):
+        with ColumnFile(path) as f:
+            existing = f.read_all(schema)
+        seen = {key(row) for row in rows}
+        rows = [row for row in existing if key(row) not in seen] + rows
+    if rows:
+        write_columns(path, schema, rows)
+
+
+def _update_index(kind, entries):
+    """
+    Adds (id, term, class_id) entries to an index file.
+    """
+    path = _index_path(kind)
+    if os.path.exists(path):
+        with ColumnFile(path) as f:
+            entries = set(entries) | set(f.read_all(INDEX_COLUMNS))
+    write_columns(path, INDEX_COLUMNS, sorted(entries))
+
+
+def archive_term(db, term, now=None):
+    """
+    Moves results + answers of tests scheduled in a closed term into
+    partition files, then deletes them from MySQL.
+    Files are written before anything is deleted, so a failed run can
+    simply be repeated.
+    """
+    start, end = term_bounds(term)
+    if end > (now or datetime.utcnow()):
+        raise ValueError(f"Term {term} is not closed yet")
+
+    cur = db.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT r.id, r.student_id, r.test_id, r.score, r.total_score,
+                   r.submitted_at, r.feedback, r.sent,
+                   s.reg_num, s.name, t.subject, t.class_id
+            FROM results r
+            JOIN tests t ON r.test_id = t.id
+            JOIN students s ON r.student_id = s.id
+            WHERE t.scheduled_datetime >= %s AND t.scheduled_datetime < %s
+            """,
+            (start, end)
+        )
+        by_class = {}
+        for row in cur.fetchall():
+            by_class.setdefault(row[-1], []).append(row[:-1])
+
+        archived = 0
+        for class_id, results in by_class.items():
+            result_ids = [row[0] for row in results]
+            answers = []
+            for chunk in _chunks(result_ids):
+                marks = ", ".join(["%s"] * len(chunk))
+                cur.execute(
+                    f"SELECT result_id, question_id, selected_index FROM answers WHERE result_id IN ({marks})",
+                    chunk
+                )
+                answers.extend(cur.fetchall())
+
+            part = partition_dir(term, class_id)
+            os.makedirs(part, exist_ok=True)
+            _merge(os.path.join(part, "results.mtc"), RESULT_COLUMNS, results,
+                   lambda row: row[0])
+            _merge(os.path.join(part, "answers.mtc"), ANSWER_COLUMNS, answers,
+                   lambda row: (row[0], row[1]))
+            # indexed before the DELETE, so no result is ever unreachable
+            _update_index("students", {(row[1], term, class_id) for row in results})
+            _update_index("tests", {(row[2], term, class_id) for row in results})
+
+            db.start_transaction()
+            for chunk in _chunks(result_ids):
+                marks = ", ".join(["%s"] * len(chunk))
+                cur.execute(f"DELETE FROM answers WHERE result_id IN ({marks})", chunk)
+                cur.execute(f"DELETE FROM results WHERE id IN ({marks})", chunk)
+            db.commit()
+
+            archived += len(results)
+            print(f"term {term} class {class_id}: {len(results)} results, {len(answers)} answers")
+
+        return archived
+    finally:
+        cur.close()
+
+
+if __name__ == "__main__":
+    from app import get_db
+
+    if len(sys.argv) != 2:
+        print("usage: python archive.py <term, e.g. 2024-1>")
+        sys.exit(1)
+
+    db = get_db()
+    try:
+        count = archive_term(db, sys.argv[1])
+        print(f"archived {count} results")
+    finally:
+        db.close()
@@ -0,0 +1,92 @@
+# bench_feedback.py
+#
+# Throughput of giving feedback to a whole class:
+#   single - one POST /api/results/<id>/feedback per student (old path)
+#   bulk   - one POST /api/results/feedback/bulk for the class
+#
+# Runs against a scratch database (BENCH_DB) through Flask's test client,
+# so it measures handler + MySQL cost without HTTP overhead.
+#
+# Usage:
+#   python bench_feedback.py [class sizes...]    # default: 120 1200
+
+import sys
+import time
+from datetime import datetime
+
+import app as backend
+from check_query_plans import connect
+from migrate import migrate
+
+BENCH_DB = "mock_test_bench"
+
+
+def setup(class_size):
+    """
+    Fresh database with one test and class_size results. Returns result ids.
+    """
+    server = connect()
+    cur = server.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS {BENCH_DB}")
+    cur.execute(f"CREATE DATABASE {BENCH_DB}")
+    cur.close()
+    server.close()
+
+    db = connect(BENCH_DB)
+    cur = db.cursor()
+    try:
+        migrate(db)
+        cur.execute("INSERT INTO classes (department, year, section) VALUES ('CSE', '2', 'A')")
+        cur.execute("INSERT INTO teachers (name, email, password_hash) VALUES ('T', 't@example.com', 'pw')")
+        cur.execute(
+            """
+            INSERT INTO tests (subject, scheduled_datetime, duration_minutes, status, class_id, created_by)
+            VALUES ('Bench', %s, 60, 'ongoing', 1, 1)
+            """,
+            (datetime(2025, 1, 1, 10, 0),)
+        )
+        cur.executemany(
+            "INSERT INTO students (name, reg_num, password_hash, class_id) VALUES (%s, %s, 'pw', 1)",
+            [(f"Student {i}", f"REG{i:06d}") for i in range(class_size)]
+        )
+        cur.executemany(
+            """
+            INSERT INTO results (student_id, test_id, score, total_score, submitted_at, feedback, sent)
+            VALUES (%s, 1, %s, 10, %s, NULL, 0)
+            """,
+            [(i + 1, i % 11, datetime(2025, 1, 1, 11, 0)) for i in range(class_size)]
+        )
+        cur.execute("SELECT id FROM results ORDER BY id")
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+        db.close()
+
+
+def run(class_size):
+    ids = setup(class_size)
+    backend.get_db = lambda: connect(BENCH_DB)
+    client = backend.app.test_client()
+
+    start = time.perf_counter()
+    for r_id in ids:
+        resp = client.post(f"/api/results/{r_id}/feedback", json={"feedback": "single"})
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    resp = client.post("/api/results/feedback/bulk", json={
+        "items": [{"resultId": r_id, "feedback": "bulk"} for r_id in ids]
+    })
+    assert resp.get_json()["updated"] == len(ids)
+    bulk = time.perf_counter() - start
+
+    print(f"{class_size} results")
+    print(f"  single  {single * 1000:9.1f} ms   {class_size / single:9.0f} rows/s   {class_size} requests")
+    print(f"  bulk    {bulk * 1000:9.1f} ms   {class_size / bulk:9.0f} rows/s   1 request")
+    print(f"  speedup {single / bulk:8.1f}x")
+
+
+if __name__ == "__main__":
+    for size in [int(a) for a in sys.argv[1:]] or [120, 1200]:
+        run(size)
@@ -0,0 +1,74 @@
+# bench_serialize.py
+#
+# Microbenchmark: cost of serializing a 10k-row results response.
+#
+#   legacy   - old handler code: unpack tuple, build dict, isoformat(),
+#              list of dicts, json.dumps (what jsonify does)
+#   mapper   - serializers.TEST_RESULT.encode with the active encoder
+#              (orjson if installed, else stdlib)
+#
+# Usage:
+#   python bench_serialize.py [rows]
+
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import serializers
+
+
+def make_rows(n):
+    start = datetime(2025, 1, 1, 9, 0, 0)
+    return [
+        (i, f"REG{i:06d}", f"Student {i}", i % 50, 50,
+         start + timedelta(seconds=i, microseconds=i % 1000),
+         "Good work" if i % 3 else None, i % 2)
+        for i in range(n)
+    ]
+
+
+def legacy(rows):
+    results = []
+    for row in rows:
+        r_id, reg, name, score, total, submitted_at, feedback, sent = row
+        if isinstance(submitted_at, datetime):
+            submitted_str = submitted_at.isoformat()
+        else:
+            submitted_str = None
+        results.append({
+            "id": r_id,
+            "studentRegNum": reg,
+            "studentName": name,
+            "score": score,
+            "totalScore": total,
+            "submittedAt": submitted_str,
+            "feedback": feedback,
+            "sent": bool(sent),
+        })
+    return json.dumps(results).encode("utf-8")
+
+
+def mapper(rows):
+    return serializers.TEST_RESULT.encode(rows)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rows = make_rows(n)
+
+    # both paths must produce the same JSON
+    assert json.loads(legacy(rows)) == json.loads(mapper(rows))
+
+    encoder = "orjson" if serializers.orjson is not None else "stdlib json"
+    print(f"{n} rows, encoder: {encoder}")
+    base = None
+    for name, fn in [("legacy", legacy), ("mapper", mapper)]:
+        runs = 20
+        best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=runs))
+        base = base or best
+        print(f"  {name:<8} {best * 1000:8.2f} ms   {base / best:5.2f}x   {len(fn(rows))} bytes")
+
+
+if __name__ == "__main__":
+    main()
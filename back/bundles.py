@@ -0,0 +1,225 @@
+# bundles.py
+#
+# Pre-published exam bundles.
+#
+# Publishing renders a test into an immutable file that clients download
+# ahead of time, so the exam start never touches the database:
+#
+#   bundles_data/<test_id>/manifest.json               (server only)
+#   bundles_data/<test_id>/<test_id>-v<n>-<hash>.bundle
+#
+# Bundle = AES-256-GCM( gzip( JSON ) ), stored as 12-byte nonce + ciphertext.
+# The JSON holds the test and its questions without correct answers.
+#
+# Timeline for a test scheduled at T:
+#   T - PREFETCH_WINDOW   bundle manifest + file become downloadable
+#   T                     the decryption key is released
+#
+# Clients decrypt with WebCrypto (AES-GCM, iv = first 12 bytes) and
+# inflate with DecompressionStream("gzip").
+#
+# Publishing requires: pip install cryptography (serving published
+# bundles and keys does not)
+#
+# Usage:
+#   python bundles.py <test_id>     # publish (or re-publish) a test
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows runs a single worker, see shared_cache.py
+    fcntl = None
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # optional dependency, only needed to publish
+    AESGCM = None
+
+from serializers import STUDENT_QUESTION, TEST, dumps
+
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bundles_data")
+PREFETCH_WINDOW = timedelta(minutes=30)
+BUNDLE_NAME = re.compile(r"([0-9]+)-v[0-9]+-[0-9a-f]{16}\.bundle")
+
+
+def _test_dir(test_id):
+    return os.path.join(BUNDLE_DIR, str(int(test_id)))
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _publish_lock(directory):
+    """
+    Serializes publishes of one test across worker processes, so two
+    publishes cannot both claim the same version number.
+    """
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(os.path.join(directory, "publish.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)   # releases the lock
+
+
+def load_manifest(test_id):
+    """
+    Server-side manifest (includes the keys), or None if not published.
+    """
+    try:
+        with open(os.path.join(_test_dir(test_id), "manifest.json"), "rb") as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def public_manifest(manifest):
+    """
+    What clients may see before the test starts (no key).
+    """
+    return {k: manifest[k] for k in ("testId", "version", "file", "sha256", "size",
+                                     "prefetchFrom", "unlockAt")}
+
+
+def _keys(manifest):
+    # manifests written before per-version keys only hold the current "key"
+    return manifest.get("keys") or {str(manifest["version"]): manifest["key"]}
+
+
+def bundle_key(manifest, version):
+    """
+    Base64 key of any published version of the test, or None.
+    """
+    return _keys(manifest).get(str(version))
+
+
+def render_test(cur, test_id):
+    """
+    Student-safe test dict (no correct answers) plus its scheduled
+    datetime, or (None, None) if the test does not exist.
+    """
+    cur.execute(
+        """
+        SELECT id, subject, scheduled_datetime, duration_minutes, status
+        FROM tests
+        WHERE id = %s
+        """,
+        (test_id,)
+    )
+    row = cur.fetchone()
+    if not row:
+        return None, None
+    test = TEST.one(row)
+
+    cur.execute(
+        """
+        SELECT q.id, b.question_text, b.choice_0, b.choice_1, b.choice_2, b.choice_3,
+               COALESCE(q.score, b.score)
+        FROM questions q
+        JOIN question_bank b ON q.bank_id = b.id
+        WHERE q.test_id = %s
+        ORDER BY q.id
+        """,
+        (test_id,)
+    )
+    test["questions"] = list(map(STUDENT_QUESTION.one, cur.fetchall()))
+    return test, row[2]
+
+
+def publish_test(db, test_id):
+    """
+    Renders, compresses and encrypts a test into a new bundle version.
+    Returns the server-side manifest, or None if the test does not exist.
+    Older versions stay on disk so clients mid-download are not broken.
+    """
+    if AESGCM is None:
+        raise RuntimeError("Publishing bundles requires: pip install cryptography")
+    cur = db.cursor()
+    try:
+        test, scheduled_dt = render_test(cur, test_id)
+    finally:
+        cur.close()
+    if test is None:
+        return None
+
+    directory = _test_dir(test_id)
+    os.makedirs(directory, exist_ok=True)
+    with _publish_lock(directory):
+        previous = load_manifest(test_id)
+        version = previous["version"] + 1 if previous else 1
+        # older versions' keys are kept: their files may still be cached by clients
+        keys = dict(_keys(previous)) if previous else {}
+        test["version"] = version
+
+        payload = gzip.compress(dumps(test), mtime=0)
+        key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(12)
+        data = nonce + AESGCM(key).encrypt(nonce, payload, None)
+        keys[str(version)] = base64.b64encode(key).decode("ascii")
+        digest = hashlib.sha256(data).hexdigest()
+
+        unlock_at = scheduled_dt if isinstance(scheduled_dt, datetime) else datetime.now()
+        manifest = {
+            "testId": int(test_id),
+            "version": version,
+            "file": f"{int(test_id)}-v{version}-{digest[:16]}.bundle",
+            "sha256": digest,
+            "size": len(data),
+            "prefetchFrom": (unlock_at - PREFETCH_WINDOW).isoformat(),
+            "unlockAt": unlock_at.isoformat(),
+            "keys": keys,
+        }
+
+        _write_atomic(os.path.join(directory, manifest["file"]), data)
+        _write_atomic(os.path.join(directory, "manifest.json"), json.dumps(manifest).encode("utf-8"))
+        return manifest
+
+
+def bundle_path(filename):
+    """
+    Path of a published bundle file plus its test's manifest,
+    or (None, None) for unknown names.
+    """
+    match = BUNDLE_NAME.fullmatch(filename)
+    if match is None:
+        return None, None
+    test_id = match.group(1)
+    path = os.path.join(_test_dir(test_id), filename)
+    if not os.path.exists(path):
+        return None, None
+    return path, load_manifest(test_id)
+
+
+if __name__ == "__main__":
+    from app import get_db
+
+    if len(sys.argv) != 2:
+        print("usage: python bundles.py <test_id>")
+        sys.exit(1)
+
+    db = get_db()
+    try:
+        manifest = publish_test(db, int(sys.argv[1]))
+        if manifest is None:
+            print("test not found")
+            sys.exit(1)
+        print(json.dumps(public_manifest(manifest), indent=2))
+    finally:
+        db.close()
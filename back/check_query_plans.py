@@ -0,0 +1,271 @@
+# check_query_plans.py
+#
+# Query-plan regression check.
+#
+# 1. Creates a scratch database (CHECK_DB), runs every migration and
+#    seeds it with enough rows that the optimizer prefers indexes.
+# 2. Calls every route through Flask's test client, recording each SQL
+#    statement the handlers execute.
+# 3. EXPLAINs every recorded statement that has a WHERE clause and fails
+#    if any of them reads a table with a full scan (type = ALL).
+#
+# Routes that are not exercised below also fail the check, so new
+# endpoints have to be added to ROUTE_CALLS.
+#
+# Usage:
+#   python check_query_plans.py      # exit code 1 on regressions
+
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+import app as backend
+import bundles
+from migrate import migrate
+from shared_cache import SharedCache
+
+CHECK_DB = "mock_test_plan_check"
+
+SEED = dict(classes=40, teachers=100, students=4000, tests=800,
+            questions_per_test=10, results=30000)
+
+# (method, url, json body) -- ids refer to seeded rows
+ROUTE_CALLS = [
+    ("POST", "/api/login", {"type": "teacher", "identifier": "teacher1@example.com", "password": "pw"}),
+    ("POST", "/api/login", {"type": "student", "identifier": "REG000001", "password": "pw"}),
+    ("GET", "/api/classes", None),
+    ("POST", "/api/tests", {
+        "subject": "Check", "scheduledDate": "2025-12-05T10:00", "duration": 60,
+        "classId": 1, "teacherId": 1, "reuseTestId": 1,
+        "questions": [
+            {"question": "New?", "choices": ["a", "b", "c", "d"], "correctAnswer": 1, "score": 5},
+            {"bankId": 1, "score": 2},
+        ],
+    }),
+    ("GET", "/api/tests/teacher/1", None),
+    ("GET", "/api/tests/student/1", None),
+    ("GET", "/api/tests/1", None),
+    ("POST", "/api/tests/1/publish", None),
+    ("GET", "/api/tests/1/bundle", None),
+    ("GET", "/api/bundles/1-v1-0000000000000000.bundle", None),
+    ("GET", "/api/tests/1/bundle/v1/key", None),
+    ("POST", "/api/tests/1/submit", {"studentId": 1, "answers": {"1": 0, "2": 1}}),
+    ("GET", "/api/results/test/1", None),
+    ("POST", "/api/results/1/feedback", {"feedback": "Good job"}),
+    ("POST", "/api/results/feedback/bulk", {"items": [
+        {"resultId": 1, "feedback": "Good"}, {"resultId": 2, "feedback": "Ok"},
+    ]}),
+    ("POST", "/api/results/feedback/bulk", {"testId": 1, "bands": [
+        {"min": 50, "feedback": "Good"}, {"min": 0, "feedback": "Keep practising"},
+    ]}),
+    ("GET", "/api/results/student/1", None),
+    ("POST", "/api/admin/login", {"email": "admin@example.com", "password": "pw"}),
+    ("GET", "/api/admin/classes", None),
+    ("POST", "/api/admin/classes", {"department": "CHK", "year": "1", "section": "Z"}),
+    ("GET", "/api/admin/teachers", None),
+    ("POST", "/api/admin/teachers", {"name": "New", "email": "new@example.com", "password": "pw"}),
+    ("GET", "/api/admin/students", None),
+    ("GET", "/api/admin/students?classId=1", None),
+    ("POST", "/api/admin/students", {"name": "New", "regNum": "NEW0001", "password": "pw", "classId": 1}),
+    ("POST", "/api/admin/students/bulk", {"students": [
+        {"name": "Bulk", "regNum": "BULK0001", "password": "pw", "classId": 1},
+    ]}),
+    ("GET", "/api/debug/profile", None),
+]
+
+
+# ---------------------- STATEMENT RECORDING ---------------------- #
+
+class RecordingCursor:
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+
+    def execute(self, statement, params=None):
+        self._log.append((statement, params))
+        return self._cursor.execute(statement, params)
+
+    def executemany(self, statement, seq_params):
+        seq_params = list(seq_params)
+        if seq_params:
+            self._log.append((statement, seq_params[0]))
+        return self._cursor.executemany(statement, seq_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class RecordingConnection:
+    def __init__(self, conn, log):
+        self._conn = conn
+        self._log = log
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self._conn.cursor(*args, **kwargs), self._log)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# ---------------------- SEEDING ---------------------- #
+
+def connect(database=None):
+    config = dict(backend.DB_CONFIG)
+    if database:
+        config["database"] = database
+    else:
+        config.pop("database", None)
+    return mysql.connector.connect(**config)
+
+
+def seed(db):
+    rnd = random.Random(42)
+    cur = db.cursor()
+    try:
+        cur.executemany(
+            "INSERT INTO classes (department, year, section) VALUES (%s, %s, %s)",
+            [(f"DEPT{i % 8}", str(i % 4 + 1), chr(65 + i % 5)) for i in range(SEED["classes"])]
+        )
+        cur.execute("INSERT INTO admins (name, email, password_hash) VALUES ('Admin', 'admin@example.com', 'pw')")
+        cur.executemany(
+            "INSERT INTO teachers (name, email, password_hash) VALUES (%s, %s, %s)",
+            [(f"Teacher {i}", f"teacher{i}@example.com", "pw") for i in range(1, SEED["teachers"] + 1)]
+        )
+        cur.executemany(
+            "INSERT INTO students (name, reg_num, password_hash, class_id) VALUES (%s, %s, %s, %s)",
+            [(f"Student {i}", f"REG{i:06d}", "pw", rnd.randint(1, SEED["classes"]))
+             for i in range(1, SEED["students"] + 1)]
+        )
+        start = datetime(2024, 1, 1, 9, 0)
+        cur.executemany(
+            """
+            INSERT INTO tests (subject, scheduled_datetime, duration_minutes, status, class_id, created_by)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            [(f"Subject {i % 20}", start + timedelta(hours=i), 60, "ongoing",
+              rnd.randint(1, SEED["classes"]), rnd.randint(1, SEED["teachers"]))
+             for i in range(SEED["tests"])]
+        )
+        bank = [(f"{i:064x}", f"Question {i}?", "a", "b", "c", "d", i % 4, 1)
+                for i in range(SEED["tests"] * SEED["questions_per_test"] // 2)]
+        cur.executemany(
+            """
+            INSERT INTO question_bank
+            (content_hash, question_text, choice_0, choice_1, choice_2, choice_3, correct_index, score)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            bank
+        )
+        cur.executemany(
+            "INSERT INTO questions (test_id, bank_id, score) VALUES (%s, %s, %s)",
+            [(t, rnd.randint(1, len(bank)), None)
+             for t in range(1, SEED["tests"] + 1) for _ in range(SEED["questions_per_test"])]
+        )
+        cur.executemany(
+            """
+            INSERT INTO results (student_id, test_id, score, total_score, submitted_at, feedback, sent)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            [(rnd.randint(1, SEED["students"]), rnd.randint(1, SEED["tests"]), rnd.randint(0, 10), 10,
+              start + timedelta(minutes=i), None, 0)
+             for i in range(SEED["results"])]
+        )
+        cur.executemany(
+            "INSERT INTO answers (result_id, question_id, selected_index) VALUES (%s, %s, %s)",
+            [(r, rnd.randint(1, SEED["tests"] * SEED["questions_per_test"]), rnd.randint(0, 3))
+             for r in range(1, SEED["results"] + 1, 3)]
+        )
+        for table in ("classes", "teachers", "students", "tests", "question_bank",
+                      "questions", "results", "answers"):
+            cur.execute(f"ANALYZE TABLE {table}")
+            cur.fetchall()
+    finally:
+        cur.close()
+
+
+# ---------------------- CHECK ---------------------- #
+
+def record_route_queries():
+    log = []
+    backend.get_db = lambda: RecordingConnection(connect(CHECK_DB), log)
+    # keep published check bundles away from the real bundles_data/
+    bundles.BUNDLE_DIR = tempfile.mkdtemp(prefix="plan_check_bundles_")
+    # empty private cache, so every handler really runs its queries
+    cache_dir = tempfile.mkdtemp(prefix="plan_check_cache_")
+    cache = SharedCache(os.path.join(cache_dir, "cache"), slots=256, arena_size=1024 * 1024)
+    backend.get_cache = lambda: cache
+    client = backend.app.test_client()
+
+    hit = set()
+    for method, url, body in ROUTE_CALLS:
+        resp = client.open(url, method=method, json=body)
+        endpoint, _ = backend.app.url_map.bind("localhost").match(url.split("?")[0], method=method)
+        # without the optional cryptography package publishing answers 503
+        unavailable = endpoint == "publish_test_bundle" and bundles.AESGCM is None
+        if resp.status_code >= 500 and not (unavailable and resp.status_code == 503):
+            raise RuntimeError(f"{method} {url} failed with {resp.status_code}")
+        hit.add(endpoint)
+
+    missing = set(backend.app.view_functions) - hit - {"static"}
+    return log, missing
+
+
+def full_scans(db, statement, params):
+    """
+    Tables EXPLAIN reports as full scans for this statement.
+    """
+    cur = db.cursor(dictionary=True)
+    try:
+        cur.execute("EXPLAIN " + statement, params)
+        return [row["table"] for row in cur.fetchall() if row["type"] == "ALL"]
+    finally:
+        cur.close()
+
+
+def main():
+    server = connect()
+    cur = server.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS {CHECK_DB}")
+    cur.execute(f"CREATE DATABASE {CHECK_DB}")
+    cur.close()
+    server.close()
+
+    db = connect(CHECK_DB)
+    try:
+        migrate(db)
+        seed(db)
+
+        log, missing = record_route_queries()
+
+        failures = []
+        checked = set()
+        for statement, params in log:
+            normalized = " ".join(statement.split())
+            if normalized in checked or " WHERE " not in normalized.upper():
+                continue
+            checked.add(normalized)
+            if normalized.upper().startswith("INSERT") and " SELECT " not in normalized.upper():
+                continue
+            scans = full_scans(db, statement, params)
+            status = "FULL SCAN " + ", ".join(scans) if scans else "ok"
+            print(f"{status:<28} {normalized[:110]}")
+            if scans:
+                failures.append(normalized)
+
+        for endpoint in sorted(missing):
+            print(f"NOT CHECKED                  route {endpoint} is missing from ROUTE_CALLS")
+    finally:
+        db.close()
+
+    if failures or missing:
+        print(f"\n{len(failures)} query plan regression(s), {len(missing)} unchecked route(s)")
+        sys.exit(1)
+    print(f"\n{len(checked)} queries checked, no full table scans")
+
+
+if __name__ == "__main__":
+    main()
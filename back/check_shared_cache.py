@@ -0,0 +1,257 @@
+# check_shared_cache.py
+#
+# Multi-process check of shared_cache.py (no Flask / MySQL needed).
+#
+# 1. Coherence: several worker processes share one cache file; a write +
+#    invalidate in one worker must be visible to all others, a value
+#    loaded before a concurrent invalidation must be rejected, and a
+#    concurrent set/get/invalidate storm must never return another key's
+#    value.
+#    The same checks run twice: once with every worker opening the cache
+#    itself, once with workers forked from a parent that opened it first
+#    (as under a preloading master), where flock must still exclude the
+#    parent and the siblings.
+# 2. Memory: the same payload cached in every worker, once as a
+#    per-process dict and once in the shared cache; total PSS
+#    (proportional set size) of the workers is compared.
+#
+# Usage:
+#   python check_shared_cache.py [workers]      # exit code 1 on failures
+
+import fcntl
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+
+from shared_cache import SharedCache
+
+PAYLOAD_ENTRIES = 400
+PAYLOAD_SIZE = 16 * 1024
+
+ctx = multiprocessing.get_context("fork")
+
+
+def temp_cache_path(prefix):
+    fd, path = tempfile.mkstemp(prefix=prefix)   # empty file, SharedCache formats it
+    os.close(fd)
+    return path
+
+
+def pss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+# ---------------------- COHERENCE ---------------------- #
+
+def try_lock(cache):
+    """
+    True if an exclusive lock could be taken right now (and releases it).
+    """
+    try:
+        fcntl.flock(cache._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    fcntl.flock(cache._fd, fcntl.LOCK_UN)
+    return True
+
+
+def worker(path, commands, replies, cache=None):
+    cache = cache or SharedCache(path)
+    for cmd, args in iter(commands.get, None):
+        if cmd == "get":
+            replies.put(cache.get(*args))
+        elif cmd == "set":
+            replies.put(cache.set(*args))
+        elif cmd == "generation":
+            replies.put(cache.generation(*args))
+        elif cmd == "invalidate":
+            cache.invalidate(*args)
+            replies.put(True)
+        elif cmd == "storm":
+            replies.put(storm(cache, *args))
+        elif cmd == "try_lock":
+            replies.put(try_lock(cache))
+        elif cmd == "hold_lock":
+            with cache._locked(fcntl.LOCK_EX):
+                replies.put(True)
+                commands.get()   # held until the next command arrives
+            replies.put(True)
+    cache.close()
+
+
+def storm(cache, seed, rounds):
+    """
+    Random set/get/invalidate; values carry their key, so a mixed-up slot
+    shows up as a wrong prefix. Returns the number of bad reads.
+    """
+    rnd = random.Random(seed)
+    bad = 0
+    for _ in range(rounds):
+        key = str(rnd.randint(0, 300))
+        op = rnd.random()
+        if op < 0.45:
+            value = cache.get("tests", key)
+            if value is not None and not value.startswith(key.encode() + b":"):
+                bad += 1
+        elif op < 0.95:
+            cache.set("tests", key, key.encode() + b":" + os.urandom(rnd.randint(10, 2000)),
+                      cache.generation("tests"))
+        else:
+            cache.invalidate("tests")
+    return bad
+
+
+class Workers:
+    def __init__(self, path, count, cache=None):
+        self.replies = [ctx.Queue() for _ in range(count)]
+        self.commands = [ctx.Queue() for _ in range(count)]
+        self.procs = [ctx.Process(target=worker, args=(path, c, r, cache))
+                      for c, r in zip(self.commands, self.replies)]
+        for p in self.procs:
+            p.start()
+
+    def call(self, idx, cmd, *args):
+        self.commands[idx].put((cmd, args))
+        return self.replies[idx].get(timeout=60)
+
+    def call_all(self, cmd, *args):
+        for c in self.commands:
+            c.put((cmd, args))
+        return [r.get(timeout=120) for r in self.replies]
+
+    def stop(self):
+        for c in self.commands:
+            c.put(None)
+        for p in self.procs:
+            p.join()
+
+
+def check_coherence(count, preload):
+    failures = []
+    path = temp_cache_path("mocktest-cache-check-")
+    parent = SharedCache(path, slots=1024, arena_size=4 * 1024 * 1024)
+    if not preload:
+        parent.close()
+    workers = Workers(path, count, parent if preload else None)
+    try:
+        workers.call(0, "set", "classes", "all", b"v1")
+        if set(workers.call_all("get", "classes", "all")) != {b"v1"}:
+            failures.append("value set by worker 0 not visible to all workers")
+
+        # worker 1 handles admin_create_class, then serves the new list
+        workers.call(1, "invalidate", "classes")
+        workers.call(1, "set", "classes", "all", b"v2")
+        if set(workers.call_all("get", "classes", "all")) != {b"v2"}:
+            failures.append("invalidation from worker 1 not seen by all workers")
+
+        # worker 2 loads from the DB while worker 3 writes
+        generation = workers.call(2, "generation", "classes")
+        workers.call(3 % count, "invalidate", "classes")
+        workers.call(2, "set", "classes", "all", b"stale", generation)
+        if set(workers.call_all("get", "classes", "all")) != {None}:
+            failures.append("value loaded before a concurrent invalidation was cached")
+
+        bad = sum(workers.call_all("storm", random.randint(0, 10 ** 6), 3000))
+        if bad:
+            failures.append(f"{bad} reads returned another key's value under concurrency")
+
+        # while worker 0 writes, nobody else may take the lock
+        workers.call(0, "hold_lock")
+        if workers.call(1, "try_lock"):
+            failures.append("a worker's exclusive lock did not exclude another worker")
+        if preload and try_lock(parent):
+            failures.append("a forked worker's exclusive lock did not exclude its parent")
+        workers.call(0, "release")
+    finally:
+        workers.stop()
+        if preload:
+            parent.close()
+        os.unlink(path)
+    return failures
+
+
+# ---------------------- MEMORY ---------------------- #
+
+def memory_worker(mode, path, ready, done):
+    # values are produced one at a time so only the cache itself holds them
+    payload = ((str(i), bytes([i % 256]) * PAYLOAD_SIZE) for i in range(PAYLOAD_ENTRIES))
+    if mode == "local":
+        local = dict(payload)
+        assert len(local) == PAYLOAD_ENTRIES
+    else:
+        cache = SharedCache(path)
+        for key, value in payload:
+            if cache.get("tests", key) is None:
+                cache.set("tests", key, value)
+        # read everything once, as a serving worker would
+        assert all(cache.get("tests", str(i)) for i in range(PAYLOAD_ENTRIES))
+    ready.set()
+    done.wait()
+
+
+def total_pss(mode, count, path):
+    done = ctx.Event()
+    readies = [ctx.Event() for _ in range(count)]
+    procs = [ctx.Process(target=memory_worker, args=(mode, path, r, done)) for r in readies]
+    for p in procs:
+        p.start()
+    for r in readies:
+        r.wait(timeout=120)
+    sizes = [pss_kb(p.pid) for p in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return None if None in sizes else sum(sizes)
+
+
+def check_memory(count):
+    path = temp_cache_path("mocktest-cache-mem-")
+    SharedCache(path, slots=4096, arena_size=PAYLOAD_ENTRIES * PAYLOAD_SIZE * 2).close()
+    try:
+        local = total_pss("local", count, path)
+        shared = total_pss("shared", count, path)
+    finally:
+        os.unlink(path)
+
+    payload_mb = PAYLOAD_ENTRIES * PAYLOAD_SIZE / 1024 / 1024
+    if local is None or shared is None:
+        print(f"memory: PSS not available on this platform (payload {payload_mb:.1f} MB)")
+        return []
+    print(f"memory: {count} workers caching {payload_mb:.1f} MB each")
+    print(f"  per-process dicts  {local / 1024:8.1f} MB total PSS")
+    print(f"  shared cache       {shared / 1024:8.1f} MB total PSS")
+    print(f"  saved              {(local - shared) / 1024:8.1f} MB per host")
+    if shared >= local:
+        return ["shared cache used no less memory than per-process caches"]
+    return []
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    count = max(count, 2)
+
+    failures = []
+    for preload, label in [(False, "own cache"), (True, "forked from a preloaded parent")]:
+        found = check_coherence(count, preload)
+        if not found:
+            print(f"coherence: ok across {count} workers ({label})")
+        failures += [f"{failure} ({label})" for failure in found]
+
+    failures += check_memory(count)
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
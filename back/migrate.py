@@ -0,0 +1,229 @@
+# migrate.py
+#
+# Versioned schema migrations for the Mock Test System.
+#
+# Applied versions are recorded in `schema_migrations`; running the tool
+# again only applies what is missing. Databases created by hand before
+# this tool existed are fine: version 1 only creates missing tables, and
+# indexes are skipped when an equivalent one is already there.
+#
+# Usage:
+#   python migrate.py            # apply pending migrations
+#   python migrate.py --status   # list applied / pending versions
+
+import sys
+
+import migrate_question_bank
+
+
+BASE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS classes (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        department VARCHAR(100) NOT NULL,
+        year VARCHAR(20) NOT NULL,
+        section VARCHAR(20) NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS admins (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS teachers (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS students (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        reg_num VARCHAR(50) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        class_id INT NOT NULL,
+        FOREIGN KEY (class_id) REFERENCES classes(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tests (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        subject VARCHAR(200) NOT NULL,
+        scheduled_datetime DATETIME NOT NULL,
+        duration_minutes INT NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        class_id INT NOT NULL,
+        created_by INT NOT NULL,
+        FOREIGN KEY (class_id) REFERENCES classes(id),
+        FOREIGN KEY (created_by) REFERENCES teachers(id)
+    )
+    """,
+    # original layout; version 2 moves the content into question_bank
+    """
+    CREATE TABLE IF NOT EXISTS questions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        test_id INT NOT NULL,
+        question_text TEXT NOT NULL,
+        choice_0 TEXT,
+        choice_1 TEXT,
+        choice_2 TEXT,
+        choice_3 TEXT,
+        correct_index INT NOT NULL,
+        score INT NOT NULL DEFAULT 0,
+        FOREIGN KEY (test_id) REFERENCES tests(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS results (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        student_id INT NOT NULL,
+        test_id INT NOT NULL,
+        score INT NOT NULL,
+        total_score INT NOT NULL,
+        submitted_at DATETIME NOT NULL,
+        feedback TEXT,
+        sent TINYINT(1) NOT NULL DEFAULT 0,
+        FOREIGN KEY (student_id) REFERENCES students(id),
+        FOREIGN KEY (test_id) REFERENCES tests(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS answers (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        result_id INT NOT NULL,
+        question_id INT NOT NULL,
+        selected_index INT NOT NULL,
+        FOREIGN KEY (result_id) REFERENCES results(id),
+        FOREIGN KEY (question_id) REFERENCES questions(id)
+    )
+    """,
+]
+
+# (table, index name, columns) -- leading columns are the hot lookups.
+# Plain, not UNIQUE: hand-made databases may hold duplicate reg_nums /
+# emails, which a unique index would fail on halfway through.
+HOT_INDEXES = [
+    ("questions", "idx_questions_test", ["test_id"]),
+    ("results", "idx_results_test_submitted", ["test_id", "submitted_at"]),
+    ("results", "idx_results_student_submitted", ["student_id", "submitted_at"]),
+    ("answers", "idx_answers_result", ["result_id"]),
+    ("tests", "idx_tests_class_scheduled", ["class_id", "scheduled_datetime"]),
+    ("tests", "idx_tests_teacher_scheduled", ["created_by", "scheduled_datetime"]),
+    ("students", "idx_students_reg_num", ["reg_num"]),
+    ("students", "idx_students_class", ["class_id"]),
+    ("teachers", "idx_teachers_email", ["email"]),
+    ("admins", "idx_admins_email", ["email"]),
+]
+
+
+def create_base_schema(db):
+    cur = db.cursor()
+    try:
+        for statement in BASE_SCHEMA:
+            cur.execute(statement)
+    finally:
+        cur.close()
+
+
+def has_index(cur, table, columns):
+    """
+    True if some index on `table` starts with `columns`.
+    """
+    cur.execute(
+        """
+        SELECT index_name, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+        """,
+        (table,)
+    )
+    indexes = {}
+    for name, column in cur.fetchall():
+        indexes.setdefault(name, []).append(column.lower())
+    return any(cols[:len(columns)] == columns for cols in indexes.values())
+
+
+def create_hot_indexes(db):
+    cur = db.cursor()
+    try:
+        for table, name, columns in HOT_INDEXES:
+            if has_index(cur, table, columns):
+                continue
+            cur.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+            print(f"  created {name}")
+    finally:
+        cur.close()
+
+
+# (version, name, function(db)) -- append only, never renumber
+MIGRATIONS = [
+    (1, "base schema", create_base_schema),
+    (2, "question bank", migrate_question_bank.migrate),
+    (3, "hot lookup indexes", create_hot_indexes),
+]
+
+
+def applied_versions(db):
+    cur = db.cursor()
+    try:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+def migrate(db):
+    """
+    Applies every pending migration in order. Returns the versions applied.
+    """
+    done = applied_versions(db)
+    applied = []
+    for version, name, fn in MIGRATIONS:
+        if version in done:
+            continue
+        print(f"applying {version}: {name}")
+        fn(db)
+        cur = db.cursor()
+        try:
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name)
+            )
+        finally:
+            cur.close()
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app import clear_cache, get_db
+
+    db = get_db()
+    try:
+        if "--status" in sys.argv:
+            done = applied_versions(db)
+            for version, name, _ in MIGRATIONS:
+                print(f"{version:>3}  {'applied' if version in done else 'pending':<8} {name}")
+        else:
+            applied = migrate(db)
+            if applied:
+                clear_cache()
+            print(f"applied {len(applied)} migration(s)" if applied else "schema is up to date")
+    finally:
+        db.close()
@@ -0,0 +1,139 @@
+# migrate_question_bank.py
+#
+# One-off migration: move question content out of `questions` into a
+# shared, content-addressed `question_bank`.
+#
+# Before:  questions(id, test_id, question_text, choice_0..3, correct_index, score)
+# After:   question_bank(id, content_hash, question_text, choice_0..3, correct_index, score)
+#          questions(id, test_id, bank_id, score)   -- score NULL = bank default
+#
+# questions.id values are kept, so answers.question_id stays valid.
+#
+# Usage:
+#   python migrate_question_bank.py            # migrate
+#   python migrate_question_bank.py --dry-run  # only report duplicates
+
+import sys
+from collections import defaultdict
+
+from app import clear_cache, get_db, question_hash
+
+
+CREATE_BANK = """
+CREATE TABLE IF NOT EXISTS question_bank (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    content_hash CHAR(64) NOT NULL,
+    question_text TEXT NOT NULL,
+    choice_0 TEXT,
+    choice_1 TEXT,
+    choice_2 TEXT,
+    choice_3 TEXT,
+    correct_index INT NOT NULL,
+    score INT NOT NULL DEFAULT 0,
+    UNIQUE KEY uq_question_bank_hash (content_hash)
+)
+"""
+
+
+def has_column(cur, table, column):
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (table, column)
+    )
+    return cur.fetchone()[0] > 0
+
+
+def find_duplicates(cur):
+    """
+    Returns {content_hash: [question ids]} for the current questions table.
+    """
+    cur.execute(
+        """
+        SELECT id, question_text, choice_0, choice_1, choice_2, choice_3, correct_index
+        FROM questions ORDER BY id
+        """
+    )
+    groups = defaultdict(list)
+    for q_id, text, c0, c1, c2, c3, correct_idx in cur.fetchall():
+        groups[question_hash(text, [c0, c1, c2, c3], correct_idx)].append(q_id)
+    return groups
+
+
+def migrate(db, dry_run=False):
+    cur = db.cursor()
+    try:
+        if has_column(cur, "questions", "bank_id") and not has_column(cur, "questions", "question_text"):
+            print("questions already migrated, nothing to do")
+            return
+
+        groups = find_duplicates(cur)
+        total = sum(len(ids) for ids in groups.values())
+        dupes = {h: ids for h, ids in groups.items() if len(ids) > 1}
+        print(f"{total} question rows, {len(groups)} unique, "
+              f"{total - len(groups)} duplicates in {len(dupes)} groups")
+        for ids in dupes.values():
+            print("  same content:", ", ".join(str(i) for i in ids))
+
+        if dry_run:
+            return
+
+        # DDL auto-commits in MySQL, so only the data copy is transactional
+        cur.execute(CREATE_BANK)
+        if not has_column(cur, "questions", "bank_id"):
+            cur.execute("ALTER TABLE questions ADD COLUMN bank_id INT NULL AFTER test_id")
+
+        db.start_transaction()
+        cur.execute(
+            """
+            SELECT id, question_text, choice_0, choice_1, choice_2, choice_3, correct_index, score
+            FROM questions ORDER BY id
+            """
+        )
+        rows = cur.fetchall()
+        for q_id, text, c0, c1, c2, c3, correct_idx, score in rows:
+            # First occurrence defines the bank's default score;
+            # every questions row keeps its own score as the override.
+            cur.execute(
+                """
+                INSERT INTO question_bank
+                (content_hash, question_text, choice_0, choice_1, choice_2, choice_3, correct_index, score)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+                """,
+                (question_hash(text, [c0, c1, c2, c3], correct_idx),
+                 text, c0, c1, c2, c3, correct_idx, score)
+            )
+            cur.execute("UPDATE questions SET bank_id = %s WHERE id = %s", (cur.lastrowid, q_id))
+        db.commit()
+
+        cur.execute(
+            """
+            ALTER TABLE questions
+                DROP COLUMN question_text,
+                DROP COLUMN choice_0,
+                DROP COLUMN choice_1,
+                DROP COLUMN choice_2,
+                DROP COLUMN choice_3,
+                DROP COLUMN correct_index,
+                MODIFY COLUMN bank_id INT NOT NULL,
+                MODIFY COLUMN score INT NULL,
+                ADD CONSTRAINT fk_questions_bank FOREIGN KEY (bank_id) REFERENCES question_bank(id)
+            """
+        )
+        print(f"migrated {len(rows)} rows into {len(groups)} bank entries")
+    finally:
+        cur.close()
+
+
+if __name__ == "__main__":
+    db = get_db()
+    try:
+        dry_run = "--dry-run" in sys.argv
+        migrate(db, dry_run=dry_run)
+        if not dry_run:
+            clear_cache()   # cached tests / answer keys point at the old rows
+    finally:
+        db.close()
@@ -0,0 +1,222 @@
+# profiling.py
+#
+# Opt-in per-request profiler.
+#
+# Enable with MOCKTEST_PROFILE=1. While enabled:
+#   - every connection from get_db() hands out cursors that record each
+#     statement, the shape of its parameters, its duration and row count
+#   - statements slower than MOCKTEST_SLOW_QUERY_MS (default 100) are
+#     logged together with their EXPLAIN plan, taken on a separate
+#     short-lived connection (the profiled one may still have unread rows)
+#   - each response carries a Server-Timing header splitting the request
+#     into db / encode / python time (visible in the browser devtools)
+#   - GET /api/debug/profile returns the last PROFILE_HISTORY requests
+#     with their statements
+#
+# With profiling off, get_db() returns plain connections and nothing here
+# runs per request.
+
+import logging
+import os
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+
+import serializers
+
+PROFILE_ENABLED = os.environ.get("MOCKTEST_PROFILE") == "1"
+SLOW_QUERY_MS = float(os.environ.get("MOCKTEST_SLOW_QUERY_MS", "100"))
+PROFILE_HISTORY = 50
+
+log = logging.getLogger("mocktest.profile")
+
+recent_profiles = deque(maxlen=PROFILE_HISTORY)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []
+        self.db_seconds = 0.0
+        self.encode_seconds = 0.0
+
+    def summary(self, status):
+        total_ms = (time.perf_counter() - self.start) * 1000
+        db_ms = self.db_seconds * 1000
+        encode_ms = self.encode_seconds * 1000
+        return {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "status": status,
+            "totalMs": round(total_ms, 2),
+            "dbMs": round(db_ms, 2),
+            "encodeMs": round(encode_ms, 2),
+            "pythonMs": round(max(total_ms - db_ms - encode_ms, 0.0), 2),
+            "queries": self.queries,
+        }
+
+
+def param_shape(params):
+    """
+    Types of the parameters, never their values: (1, "x") -> "(int, str)".
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+
+
+class ProfilingCursor:
+    """
+    Wraps a mysql.connector cursor; execute and fetch time both count
+    towards the statement that produced the rows.
+    """
+
+    def __init__(self, cursor, connect, profile):
+        self._cursor = cursor
+        self._connect = connect
+        self._profile = profile
+        self._entry = None
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._profile.db_seconds += elapsed
+            if self._entry is not None:
+                self._entry["ms"] += elapsed * 1000
+
+    def _begin(self, statement, shape):
+        self._entry = {"sql": " ".join(statement.split()), "params": shape, "ms": 0.0, "rows": 0}
+        self._profile.queries.append(self._entry)
+        self._explain_args = None
+
+    def execute(self, statement, params=None):
+        self._begin(statement, param_shape(params))
+        self._explain_args = (statement, params)
+        result = self._timed(self._cursor.execute, statement, params)
+        if not self._cursor.with_rows:
+            self._entry["rows"] = self._cursor.rowcount
+            self._check_slow()
+        return result
+
+    def executemany(self, statement, seq_params):
+        seq_params = list(seq_params)
+        shape = param_shape(seq_params[0]) if seq_params else None
+        self._begin(statement, f"{len(seq_params)} x {shape}")
+        result = self._timed(self._cursor.executemany, statement, seq_params)
+        self._entry["rows"] = self._cursor.rowcount
+        self._check_slow()
+        return result
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is not None:
+            self._entry["rows"] += 1
+        self._check_slow()
+        return row
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._entry["rows"] += len(rows)
+        self._check_slow()
+        return rows
+
+    def _check_slow(self):
+        entry = self._entry
+        if entry["ms"] < SLOW_QUERY_MS or entry.get("slow"):
+            return
+        entry["slow"] = True
+        plan = None
+        if self._explain_args and entry["sql"].split(" ", 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "INSERT"):
+            plan = explain(self._connect, *self._explain_args)
+        entry["plan"] = plan
+        log.warning("slow query %.1f ms, %d rows: %s params=%s plan=%s",
+                    entry["ms"], entry["rows"], entry["sql"], entry["params"], plan)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def explain(connect, statement, params):
+    """
+    EXPLAIN on a new connection from connect(). Never raises: a failure
+    is returned as the plan, it must not break the request.
+    """
+    conn = cur = None
+    try:
+        conn = connect()
+        cur = conn.cursor(dictionary=True, buffered=True)
+        cur.execute("EXPLAIN " + statement, params)
+        return [
+            {k: row[k] for k in ("table", "type", "key", "rows", "Extra") if k in row}
+            for row in cur.fetchall()
+        ]
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        for resource in (cur, conn):
+            if resource is not None:
+                try:
+                    resource.close()
+                except Exception:
+                    pass
+
+
+class ProfilingConnection:
+    def __init__(self, conn, connect, profile):
+        self._conn = conn
+        self._connect = connect
+        self._profile = profile
+
+    def cursor(self, *args, **kwargs):
+        return ProfilingCursor(self._conn.cursor(*args, **kwargs), self._connect, self._profile)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def wrap_connection(conn, connect):
+    """
+    Used by get_db(): profiling connection during a profiled request,
+    the connection itself otherwise. connect() opens another connection
+    to the same database, used for EXPLAINs of slow statements.
+    """
+    if PROFILE_ENABLED and has_request_context() and "profile" in g:
+        return ProfilingConnection(conn, connect, g.profile)
+    return conn
+
+
+def _record_encode(seconds):
+    if has_request_context() and "profile" in g:
+        g.profile.encode_seconds += seconds
+
+
+def init_app(app):
+    if not PROFILE_ENABLED:
+        return
+
+    serializers.encode_hook = _record_encode
+
+    @app.before_request
+    def start_profile():
+        g.profile = RequestProfile()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        summary = profile.summary(response.status_code)
+        if request.endpoint != "debug_profile":
+            recent_profiles.append(summary)
+        response.headers["Server-Timing"] = (
+            f"db;dur={summary['dbMs']}, encode;dur={summary['encodeMs']}, "
+            f"python;dur={summary['pythonMs']}, total;dur={summary['totalMs']}"
+        )
+        response.headers["X-Query-Count"] = str(len(profile.queries))
+        return response
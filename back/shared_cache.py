@@ -0,0 +1,278 @@
+# shared_cache.py
+#
+# Host-wide cache shared by all worker processes.
+#
+# Every worker maps the same file (under /dev/shm when available), so a
+# cached response exists once per host instead of once per worker.
+#
+# Layout of the mapped file:
+#   header   magic | slot count | pad | arena size | arena used
+#            | one u64 generation counter per namespace
+#   slots    open-addressed table: key hash, generation, namespace,
+#            key/value lengths, arena offset
+#   arena    key + value bytes, bump-allocated; reset when full
+#
+# Invalidation: writers call invalidate(namespace), which bumps that
+# namespace's generation counter. Entries stored under an older
+# generation are treated as misses by every worker immediately.
+#
+# Cross-process locking uses flock on the file (shared for reads,
+# exclusive for writes); a threading lock covers threads of one worker.
+# flock locks belong to the open file description, so a process forked
+# from one that already opened the cache (e.g. a preloading master)
+# re-opens the file for itself before its first lock.
+#
+# Without fcntl (Windows) SharedCache.for_host returns a LocalCache: same
+# API, but private to the process, so run a single worker there.
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, see LocalCache
+    fcntl = None
+
+NAMESPACES = ("classes", "teachers", "tests", "answer_keys")
+
+CACHE_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+MAGIC = b"MTCACHE1"
+HEADER = struct.Struct(f"<8sIIQQ{len(NAMESPACES)}Q")
+SLOT = struct.Struct("<QQIIIIQ")   # hash, generation, ns, key len, value len, pad, offset
+PROBES = 8
+
+# open caches of this process, re-opened in forked children
+_instances = weakref.WeakSet()
+
+
+class SharedCache:
+    def __init__(self, path, slots=4096, arena_size=64 * 1024 * 1024):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            size = HEADER.size + slots * SLOT.size + arena_size
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                header = HEADER.pack(MAGIC, slots, 0, arena_size, 0, *([0] * len(NAMESPACES)))
+                os.pwrite(self._fd, header, 0)
+            self._map = mmap.mmap(self._fd, 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        header = HEADER.unpack_from(self._map, 0)
+        if header[0] != MAGIC:
+            raise ValueError(f"Not a cache file: {path}")
+        self.slots = header[1]
+        self.arena_size = header[3]
+        self._slots_start = HEADER.size
+        self._arena_start = HEADER.size + self.slots * SLOT.size
+        _instances.add(self)
+
+    @classmethod
+    def for_host(cls, name, **kwargs):
+        """
+        Cache shared by every process on this host using the same name
+        (a per-process LocalCache where flock is not available).
+        """
+        if fcntl is None:
+            return LocalCache(**kwargs)
+        return cls(os.path.join(CACHE_DIR, f"mocktest-cache-{name}"), **kwargs)
+
+    # ---------------------- locking ---------------------- #
+
+    def _after_fork(self):
+        # the inherited mapping stays valid; only the descriptor (and with
+        # it the flock) and the thread lock must be the child's own
+        self._thread_lock = threading.Lock()
+        inherited = self._fd
+        self._fd = os.open(self.path, os.O_RDWR)
+        os.close(inherited)
+
+    @contextmanager
+    def _locked(self, mode):
+        with self._thread_lock:
+            fcntl.flock(self._fd, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # ---------------------- header fields ---------------------- #
+
+    def _gen_offset(self, ns_idx):
+        return HEADER.size - (len(NAMESPACES) - ns_idx) * 8
+
+    def _generation(self, ns_idx):
+        return struct.unpack_from("<Q", self._map, self._gen_offset(ns_idx))[0]
+
+    def _arena_used(self):
+        return struct.unpack_from("<Q", self._map, 24)[0]
+
+    def _set_arena_used(self, used):
+        struct.pack_into("<Q", self._map, 24, used)
+
+    # ---------------------- slots ---------------------- #
+
+    @staticmethod
+    def _hash(namespace, key):
+        digest = hashlib.blake2b(f"{namespace}\0{key}".encode("utf-8"), digest_size=8).digest()
+        return struct.unpack("<Q", digest)[0] or 1   # 0 marks an empty slot
+
+    def _slot_offset(self, idx):
+        return self._slots_start + idx * SLOT.size
+
+    def _probe(self, key_hash):
+        start = key_hash % self.slots
+        return [(start + i) % self.slots for i in range(PROBES)]
+
+    def _read_key(self, offset, key_len):
+        begin = self._arena_start + offset
+        return bytes(self._map[begin:begin + key_len])
+
+    # ---------------------- API ---------------------- #
+
+    def generation(self, namespace):
+        with self._locked(fcntl.LOCK_SH):
+            return self._generation(NAMESPACES.index(namespace))
+
+    def get(self, namespace, key):
+        """
+        Cached bytes, or None on a miss / stale entry.
+        """
+        ns_idx = NAMESPACES.index(namespace)
+        key_hash = self._hash(namespace, key)
+        key_bytes = str(key).encode("utf-8")
+
+        with self._locked(fcntl.LOCK_SH):
+            generation = self._generation(ns_idx)
+            for idx in self._probe(key_hash):
+                h, gen, ns, key_len, val_len, _, offset = SLOT.unpack_from(self._map, self._slot_offset(idx))
+                if h == 0:
+                    return None
+                if h == key_hash and ns == ns_idx and self._read_key(offset, key_len) == key_bytes:
+                    if gen != generation:
+                        return None
+                    begin = self._arena_start + offset + key_len
+                    return bytes(self._map[begin:begin + val_len])
+        return None
+
+    def set(self, namespace, key, value, generation=None):
+        """
+        Stores bytes. Pass the generation read *before* loading the value
+        from the database: if the namespace was invalidated meanwhile,
+        the (possibly stale) value is dropped.
+        """
+        ns_idx = NAMESPACES.index(namespace)
+        key_hash = self._hash(namespace, key)
+        key_bytes = str(key).encode("utf-8")
+        size = len(key_bytes) + len(value)
+        if size > self.arena_size // 4:
+            return False
+
+        with self._locked(fcntl.LOCK_EX):
+            current = self._generation(ns_idx)
+            if generation is not None and generation != current:
+                return False
+
+            used = self._arena_used()
+            if used + size > self.arena_size:
+                # arena full: drop everything and start over
+                self._map[self._slots_start:self._arena_start] = bytes(self.slots * SLOT.size)
+                used = 0
+
+            target = None
+            for idx in self._probe(key_hash):
+                h, gen, ns, key_len, _, _, offset = SLOT.unpack_from(self._map, self._slot_offset(idx))
+                if h == 0 or (h == key_hash and ns == ns_idx and self._read_key(offset, key_len) == key_bytes):
+                    target = idx
+                    break
+                if target is None and gen != self._generation(ns):
+                    target = idx   # stale entry of any namespace can be reused
+            if target is None:
+                target = self._probe(key_hash)[0]
+
+            begin = self._arena_start + used
+            self._map[begin:begin + size] = key_bytes + value
+            SLOT.pack_into(self._map, self._slot_offset(target),
+                           key_hash, current, ns_idx, len(key_bytes), len(value), 0, used)
+            self._set_arena_used(used + size)
+        return True
+
+    def invalidate(self, namespace):
+        """
+        Bumps the namespace generation; every worker sees it on its next get().
+        """
+        ns_idx = NAMESPACES.index(namespace)
+        with self._locked(fcntl.LOCK_EX):
+            struct.pack_into("<Q", self._map, self._gen_offset(ns_idx), self._generation(ns_idx) + 1)
+
+    def close(self):
+        _instances.discard(self)
+        self._map.close()
+        os.close(self._fd)
+
+
+class LocalCache:
+    """
+    In-process fallback with the SharedCache API. Invalidations are only
+    seen by the process that made them.
+    """
+
+    def __init__(self, slots=4096, arena_size=64 * 1024 * 1024):
+        self.arena_size = arena_size
+        self._lock = threading.Lock()
+        self._generations = dict.fromkeys(NAMESPACES, 0)
+        self._entries = {}   # (namespace, key) -> (generation, value)
+        self._used = 0
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations[namespace]
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, str(key)))
+            if entry is None or entry[0] != self._generations[namespace]:
+                return None
+            return entry[1]
+
+    def set(self, namespace, key, value, generation=None):
+        if len(value) > self.arena_size // 4:
+            return False
+        with self._lock:
+            current = self._generations[namespace]
+            if generation is not None and generation != current:
+                return False
+            if self._used + len(value) > self.arena_size:
+                # same policy as the shared arena: drop everything when full
+                self._entries.clear()
+                self._used = 0
+            self._entries[(namespace, str(key))] = (current, value)
+            self._used += len(value)
+        return True
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._generations[namespace] += 1
+
+    def close(self):
+        self._entries.clear()
+
+
+def _reopen_after_fork():
+    for cache in list(_instances):
+        cache._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)